@@ -0,0 +1,136 @@
+"""Compare the thread-per-connection model against the shared reactor.
+
+Usage::
+
+    python benchmarks/reactor.py [--connections 1000 10000 50000]
+
+For each connection count and each model, a server process accepts the
+requested number of WebSocket connections from a client process over the
+loopback interface. Once all the connections are established, the client
+sends one message on each of them, and the server receives it and sends a
+reply. The server reports its resident memory after the connections are
+established, and the context switches incurred while the messages were
+exchanged.
+
+Each process holds one file descriptor per connection, so the open file limit
+(``ulimit -n``) must be higher than the largest connection count.
+"""
+import argparse
+import json
+import resource
+import socket
+import subprocess
+import sys
+import time
+
+from wsproto.frame_protocol import FrameProtocol
+
+import simple_websocket
+
+ENVIRON = {
+    'HTTP_HOST': 'localhost',
+    'HTTP_CONNECTION': 'Upgrade',
+    'HTTP_UPGRADE': 'websocket',
+    'HTTP_SEC_WEBSOCKET_KEY': 'Iv8io/9s+lYFgZWcXczP8Q==',
+    'HTTP_SEC_WEBSOCKET_VERSION': '13',
+}
+
+
+def rss():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    return 0  # pragma: no cover
+
+
+def context_switches():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_nvcsw + usage.ru_nivcsw
+
+
+def serve(mode, connections):
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1024)
+    print(listener.getsockname()[1], flush=True)
+
+    reactor = simple_websocket.Reactor() if mode == 'reactor' else None
+    base_rss = rss()
+    servers = []
+    for _ in range(connections):
+        sock, _ = listener.accept()
+        # the HTTP request was handled by the web server, so only the
+        # handshake response is sent
+        servers.append(simple_websocket.Server.accept(
+            dict(ENVIRON, **{'werkzeug.socket': sock}), reactor=reactor))
+    time.sleep(1)
+    conn_rss = rss() - base_rss
+    print('ready', flush=True)
+
+    sys.stdin.readline()
+    start = context_switches()
+    for server in servers:
+        server.send(server.receive())
+    switches = context_switches() - start
+    sys.stdin.readline()
+    print(json.dumps({'rss': conn_rss, 'context_switches': switches}),
+          flush=True)
+
+
+def run(mode, connections):
+    proc = subprocess.Popen(
+        [sys.executable, __file__, '--serve', mode, str(connections)],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    socks = []
+    try:
+        port = int(proc.stdout.readline())
+        for _ in range(connections):
+            socks.append(socket.create_connection(('127.0.0.1', port)))
+        assert proc.stdout.readline().strip() == 'ready'
+        for sock in socks:
+            while not sock.recv(4096).endswith(b'\r\n\r\n'):
+                pass
+
+        frame = bytes(FrameProtocol(client=True, extensions=[]).send_data(
+            b'hello'))
+        proc.stdin.write('go\n')
+        proc.stdin.flush()
+        for sock in socks:
+            sock.sendall(frame)
+        for sock in socks:
+            sock.recv(4096)
+        proc.stdin.write('done\n')
+        proc.stdin.flush()
+        result = json.loads(proc.stdout.readline())
+    finally:
+        for sock in socks:
+            sock.close()
+        proc.kill()
+        proc.wait()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--connections', type=int, nargs='+',
+                        default=[1000, 10000, 50000])
+    parser.add_argument('--serve', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve[0], int(args.serve[1]))
+        return
+
+    print(f'{"connections":>11}  {"model":>8}  {"memory (MB)":>11}  '
+          f'{"KB/conn":>7}  {"ctx switches":>12}')
+    for connections in args.connections:
+        for mode in ['thread', 'reactor']:
+            result = run(mode, connections)
+            print(f'{connections:>11}  {mode:>8}  '
+                  f'{result["rss"] / 1024 / 1024:>11.1f}  '
+                  f'{result["rss"] / 1024 / connections:>7.1f}  '
+                  f'{result["context_switches"]:>12}', flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import asyncio
+from collections import deque
 import ssl
 from time import time
 from urllib.parse import urlsplit
@@ -23,16 +24,25 @@ from .errors import ConnectionError, ConnectionClosed
 
 class AioBase:
     def __init__(self, connection_type=None, receive_bytes=4096,
-                 ping_interval=None, max_message_size=None):
+                 ping_interval=None, max_message_size=None, max_queue=None,
+                 max_queue_size=None):
         #: The name of the subprotocol chosen for the WebSocket connection.
         self.subprotocol = None
+        #: The total size of the messages waiting to be received.
+        self.queue_bytes = 0
+        #: The number of times reading from the socket was paused because
+        #: the queue of received messages was full.
+        self.queue_high_water_hits = 0
 
         self.connection_type = connection_type
         self.receive_bytes = receive_bytes
         self.ping_interval = ping_interval
         self.max_message_size = max_message_size
+        self.max_queue = max_queue
+        self.max_queue_size = max_queue_size
         self.pong_received = True
-        self.input_buffer = []
+        self.input_buffer = deque()
+        self.reading_paused = False
         self.incoming_message = None
         self.incoming_message_len = 0
         self.connected = False
@@ -43,6 +53,7 @@ class AioBase:
         self.rsock = None
         self.wsock = None
         self.event = asyncio.Event()
+        self.queue_event = asyncio.Event()
         self.ws = None
         self.task = None
 
@@ -90,12 +101,23 @@ class AioBase:
                 return None
             self.event.clear()  # pragma: no cover
         try:
-            return self.input_buffer.pop(0)
+            data = self.input_buffer.popleft()
         except IndexError:
             pass
+        else:
+            self.queue_bytes -= len(data)
+            if self.reading_paused and not self._queue_full():
+                self.reading_paused = False
+                self.queue_event.set()
+            return data
         if not self.connected:  # pragma: no cover
             raise ConnectionClosed(self.close_reason, self.close_message)
 
+    @property
+    def queue_depth(self):
+        """The number of messages waiting to be received."""
+        return len(self.input_buffer)
+
     async def close(self, reason=None, message=None):
         """Close the WebSocket connection.
 
@@ -113,6 +135,7 @@ class AioBase:
         except BrokenPipeError:  # pragma: no cover
             pass
         self.connected = False
+        self.queue_event.set()
 
     def choose_subprotocol(self, request):  # pragma: no cover
         # The method should return the subprotocol to use, or ``None`` if no
@@ -126,6 +149,14 @@ class AioBase:
             next_ping = time() + self.ping_interval
 
         while self.connected:
+            if self._pause_reading():
+                # stop reading until the application consumes some of the
+                # queued messages, so that TCP flow control pushes back on
+                # the other side
+                while self.connected and self.reading_paused:
+                    await self.queue_event.wait()
+                    self.queue_event.clear()
+                continue
             try:
                 in_data = b''
                 if next_ping:
@@ -163,6 +194,18 @@ class AioBase:
             self.connected = await self._handle_events()
         self.wsock.close()
 
+    def _queue_full(self):
+        return bool(
+            (self.max_queue and len(self.input_buffer) >= self.max_queue) or
+            (self.max_queue_size and self.queue_bytes >= self.max_queue_size))
+
+    def _pause_reading(self):
+        if not self._queue_full():
+            return False
+        self.queue_high_water_hits += 1
+        self.reading_paused = True
+        return True
+
     async def _handle_events(self):
         keep_going = True
         out_data = b''
@@ -221,14 +264,15 @@ class AioBase:
                         continue
                     if isinstance(self.incoming_message, (str, bytes)):
                         # single part message
-                        self.input_buffer.append(self.incoming_message)
+                        message = self.incoming_message
                     elif isinstance(event, TextMessage):
                         # convert multi-part message back to text
-                        self.input_buffer.append(
-                            self.incoming_message.decode())
+                        message = self.incoming_message.decode()
                     else:
                         # convert multi-part message back to bytes
-                        self.input_buffer.append(bytes(self.incoming_message))
+                        message = bytes(self.incoming_message)
+                    self.input_buffer.append(message)
+                    self.queue_bytes += len(message)
                     self.incoming_message = None
                     self.incoming_message_len = 0
                     self.event.set()
@@ -251,11 +295,13 @@ class AioServer(AioBase):
     each bound to a client request.
     """
     def __init__(self, request, subprotocols=None, receive_bytes=4096,
-                 ping_interval=None, max_message_size=None):
+                 ping_interval=None, max_message_size=None, max_queue=None,
+                 max_queue_size=None):
         super().__init__(connection_type=ConnectionType.SERVER,
                          receive_bytes=receive_bytes,
                          ping_interval=ping_interval,
-                         max_message_size=max_message_size)
+                         max_message_size=max_message_size,
+                         max_queue=max_queue, max_queue_size=max_queue_size)
         self.request = request
         self.headers = {}
         self.subprotocols = subprotocols or []
@@ -266,7 +312,8 @@ class AioServer(AioBase):
     @classmethod
     async def accept(cls, aiohttp=None, asgi=None, sock=None, headers=None,
                      subprotocols=None, receive_bytes=4096, ping_interval=None,
-                     max_message_size=None):
+                     max_message_size=None, max_queue=None,
+                     max_queue_size=None):
         """Accept a WebSocket connection from a client.
 
         :param aiohttp: The request object from aiohttp. If this argument is
@@ -294,6 +341,17 @@ class AioServer(AioBase):
         :param max_message_size: The maximum size allowed for a message, in
                                  bytes, or ``None`` for no limit. The default
                                  is ``None``.
+        :param max_queue: The maximum number of received messages that can be
+                          queued while waiting to be returned by
+                          ``receive()``, or ``None`` (the default) for no
+                          limit. When the queue is full the connection stops
+                          reading from the socket, so that TCP flow control
+                          pushes back on the other side.
+        :param max_queue_size: The maximum total size of the received
+                               messages that can be queued, in bytes for
+                               binary messages and characters for text
+                               messages, or ``None`` (the default) for no
+                               limit.
         """
         if aiohttp and (asgi or sock):
             raise ValueError('aiohttp argument cannot be used with asgi or '
@@ -309,7 +367,8 @@ class AioServer(AioBase):
         ws = cls({'aiohttp': aiohttp, 'sock': sock, 'headers': headers},
                  subprotocols=subprotocols, receive_bytes=receive_bytes,
                  ping_interval=ping_interval,
-                 max_message_size=max_message_size)
+                 max_message_size=max_message_size, max_queue=max_queue,
+                 max_queue_size=max_queue_size)
         await ws._accept()
         return ws
 
@@ -365,11 +424,12 @@ class AioClient(AioBase):
     """
     def __init__(self, url, subprotocols=None, headers=None,
                  receive_bytes=4096, ping_interval=None, max_message_size=None,
-                 ssl_context=None):
+                 ssl_context=None, max_queue=None, max_queue_size=None):
         super().__init__(connection_type=ConnectionType.CLIENT,
                          receive_bytes=receive_bytes,
                          ping_interval=ping_interval,
-                         max_message_size=max_message_size)
+                         max_message_size=max_message_size,
+                         max_queue=max_queue, max_queue_size=max_queue_size)
         self.url = url
         self.ssl_context = ssl_context
         parsed_url = urlsplit(url)
@@ -394,7 +454,8 @@ class AioClient(AioBase):
     async def connect(cls, url, subprotocols=None, headers=None,
                       receive_bytes=4096, ping_interval=None,
                       max_message_size=None, ssl_context=None,
-                      thread_class=None, event_class=None):
+                      thread_class=None, event_class=None, max_queue=None,
+                      max_queue_size=None):
         """Returns a WebSocket client connection.
 
         :param url: The connection URL. Both ``ws://`` and ``wss://`` URLs are
@@ -424,10 +485,22 @@ class AioClient(AioBase):
                                  is ``None``.
         :param ssl_context: An ``SSLContext`` instance, if a default SSL
                             context isn't sufficient.
+        :param max_queue: The maximum number of received messages that can be
+                          queued while waiting to be returned by
+                          ``receive()``, or ``None`` (the default) for no
+                          limit. When the queue is full the connection stops
+                          reading from the socket, so that TCP flow control
+                          pushes back on the other side.
+        :param max_queue_size: The maximum total size of the received
+                               messages that can be queued, in bytes for
+                               binary messages and characters for text
+                               messages, or ``None`` (the default) for no
+                               limit.
         """
         ws = cls(url, subprotocols=subprotocols, headers=headers,
                  receive_bytes=receive_bytes, ping_interval=ping_interval,
-                 max_message_size=max_message_size, ssl_context=ssl_context)
+                 max_message_size=max_message_size, ssl_context=ssl_context,
+                 max_queue=max_queue, max_queue_size=max_queue_size)
         await ws._connect()
         return ws
 
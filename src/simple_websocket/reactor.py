@@ -0,0 +1,407 @@
+import heapq
+import itertools
+import selectors
+import socket
+import ssl
+import threading
+from time import time
+
+from wsproto.utilities import LocalProtocolError
+
+
+class _Connection:
+    def __init__(self, ws):
+        self.ws = ws
+        self.sock = ws.sock
+        self.fd = ws.sock.fileno()
+        self.out_buffer = bytearray()
+        self.cond = threading.Condition()
+        self.events = 0
+        self.writing = False
+        self.paused = False
+        self.closing = False
+        self.closed = False
+
+
+class Reactor:
+    """A shared I/O loop for synchronous WebSocket connections.
+
+    By default each ``Server`` and ``Client`` instance starts a background
+    thread that blocks on its socket waiting for data. A reactor replaces all
+    those threads with a single thread that monitors every registered socket
+    with a selector, reads the data that arrives and wakes up the
+    ``receive()`` calls that are waiting for it. The ``receive()``, ``send()``
+    and ``close()`` methods of the connections keep their blocking semantics.
+
+    The sockets of the connections registered with a reactor are switched to
+    non-blocking mode, and all outgoing data is buffered, so that a peer that
+    stops reading cannot stall the other connections. A ``send()`` call blocks
+    while the buffer of its connection is full.
+
+    Instead of creating instances of this class directly, pass
+    ``reactor=True`` to ``Server.accept()`` or ``Client.connect()`` to use a
+    reactor that is shared by all the connections in the process.
+    Applications that prefer to partition their connections, or that need
+    custom thread or selector classes, can create their own reactors and pass
+    them in the ``reactor`` argument.
+
+    :param selector_class: The ``Selector`` class to use. The default is the
+                           ``selectors.DefaultSelector`` class from the
+                           Python standard library.
+    :param thread_class: The ``Thread`` class to use when creating the
+                         reactor's background thread. The default is the
+                         ``threading.Thread`` class from the Python standard
+                         library.
+    :param write_buffer_size: The amount of outgoing data, in bytes, that can
+                              be buffered for a connection before ``send()``
+                              blocks. The default is 1MB.
+    :param close_timeout: The time, in seconds, that a closed connection is
+                          given to flush its buffered data before its socket
+                          is closed. The default is 5 seconds.
+    """
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, selector_class=None, thread_class=None,
+                 write_buffer_size=1024 * 1024, close_timeout=5):
+        if selector_class is None:
+            selector_class = selectors.DefaultSelector
+        if thread_class is None:
+            thread_class = threading.Thread
+        self.selector = selector_class()
+        self.thread_class = thread_class
+        self.write_buffer_size = write_buffer_size
+        self.close_timeout = close_timeout
+        self.thread = None
+        self.thread_ident = None
+        self.running = True
+        self.lock = threading.Lock()
+        self.connections = {}
+        self.requests = []
+        self.timers = []
+        self.timer_ids = itertools.count()
+
+        # the wakeup socket pair allows other threads to interrupt the
+        # selector when they need the reactor's attention
+        self.wakeup_rsock, self.wakeup_wsock = socket.socketpair()
+        self.wakeup_rsock.setblocking(False)
+        self.wakeup_wsock.setblocking(False)
+        self.selector.register(self.wakeup_rsock, selectors.EVENT_READ, None)
+
+    @classmethod
+    def default(cls):
+        """Return the reactor that is shared by all the connections in the
+        process, creating it if necessary.
+
+        The shared reactor always uses the ``threading.Thread`` and
+        ``selectors.DefaultSelector`` classes from the Python standard
+        library.
+        """
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+        return cls._default
+
+    def register(self, ws):
+        """Start monitoring a connection.
+
+        :param ws: The ``Server`` or ``Client`` instance to monitor.
+        """
+        conn = _Connection(ws)
+        with self.lock:
+            if not self.running:
+                raise RuntimeError('The reactor is closed')
+            ws.sock.setblocking(False)
+            self.connections[ws] = conn
+            self.requests.append(('add', conn))
+            if self.thread is None:
+                self.thread = self.thread_class(target=self._run)
+                self.thread.name = self.thread.name.replace(
+                    '(_run)', '(simple_websocket.Reactor._run)')
+                self.thread.daemon = True
+                self.thread.start()
+        self._wakeup()
+
+    def unregister(self, ws):
+        """Stop monitoring a connection and close its socket once its
+        buffered data has been sent.
+
+        :param ws: The ``Server`` or ``Client`` instance to stop monitoring.
+        """
+        self._request('close', ws)
+
+    def resume(self, ws):
+        """Resume reading from a connection that was paused because its
+        queue of received messages was full.
+
+        :param ws: The ``Server`` or ``Client`` instance.
+        """
+        self._request('resume', ws)
+
+    def write(self, ws, data):
+        """Send data on a connection.
+
+        The data is written right away if the socket can take it, and
+        buffered otherwise. When called from a thread other than the
+        reactor's, this method blocks while the connection's buffer is full.
+
+        :param ws: The ``Server`` or ``Client`` instance.
+        :param data: The data to send.
+        """
+        conn = self.connections.get(ws)
+        if conn is None:
+            raise BrokenPipeError()
+        block = threading.get_ident() != self.thread_ident
+        with conn.cond:
+            while block and not conn.closed and \
+                    len(conn.out_buffer) >= self.write_buffer_size:
+                conn.cond.wait()
+            if conn.closed:
+                raise BrokenPipeError()
+            conn.out_buffer += data
+            if conn.writing:
+                return
+            if not self._flush(conn):
+                self._request('abort', ws)
+                raise BrokenPipeError()
+            if not conn.out_buffer:
+                return
+            conn.writing = True
+        self._request('write', ws)
+
+    def close(self):
+        """Stop the reactor and close all the connections registered with
+        it."""
+        with self.lock:
+            if not self.running:
+                return
+            self.running = False
+            thread = self.thread
+        with Reactor._default_lock:
+            if Reactor._default is self:
+                Reactor._default = None
+        if thread is None:
+            self._shutdown()
+            return
+        self._wakeup()
+        if threading.get_ident() != self.thread_ident:
+            thread.join()
+
+    def _request(self, op, ws):
+        with self.lock:
+            conn = self.connections.get(ws)
+            if conn is None:
+                return
+            self.requests.append((op, conn))
+        self._wakeup()
+
+    def _wakeup(self):
+        try:
+            self.wakeup_wsock.send(b'\0')
+        except OSError:  # pragma: no cover
+            # the socket buffer is full, so the reactor is going to wake up
+            # anyway
+            pass
+
+    def _run(self):
+        self.thread_ident = threading.get_ident()
+        while self.running:
+            timeout = None
+            if self.timers:
+                timeout = max(self.timers[0][0] - time(), 0)
+            try:
+                events = self.selector.select(timeout)
+            except (OSError, ValueError):  # pragma: no cover
+                # a socket was closed without being unregistered
+                self._purge()
+                continue
+            for key, mask in events:
+                conn = key.data
+                if conn is None:
+                    try:
+                        while self.wakeup_rsock.recv(4096):
+                            pass
+                    except OSError:
+                        pass
+                    continue
+                if mask & selectors.EVENT_WRITE:
+                    self._writable(conn)
+                if mask & selectors.EVENT_READ and not conn.closed:
+                    self._read(conn)
+            self._process_requests()
+            self._process_timers()
+        self._shutdown()
+
+    def _shutdown(self):
+        for conn in list(self.connections.values()):
+            self._finalize(conn)
+        self.selector.close()
+        self.wakeup_rsock.close()
+        self.wakeup_wsock.close()
+
+    def _process_requests(self):
+        with self.lock:
+            requests, self.requests = self.requests, []
+        for op, conn in requests:
+            if conn.closed:
+                continue
+            if op == 'add':
+                self._add(conn)
+            elif op == 'write':
+                self._update(conn)
+            elif op == 'resume':
+                conn.paused = False
+                self._update(conn)
+            elif op == 'close':
+                self._close(conn)
+            else:
+                self._finalize(conn)
+
+    def _process_timers(self):
+        now = time()
+        while self.timers and self.timers[0][0] <= now:
+            deadline, _, callback, conn = heapq.heappop(self.timers)
+            if not conn.closed:
+                callback(conn, deadline)
+
+    def _add_timer(self, deadline, callback, conn):
+        heapq.heappush(self.timers,
+                       (deadline, next(self.timer_ids), callback, conn))
+
+    def _add(self, conn):
+        try:
+            self.selector.register(conn.sock, selectors.EVENT_READ, conn)
+        except KeyError:
+            # the file descriptor belongs to a socket that was closed without
+            # being unregistered, so the stale entry has to be discarded
+            self._finalize(self.selector.get_map()[conn.fd].data)
+            self.selector.register(conn.sock, selectors.EVENT_READ, conn)
+        except (ValueError, OSError):  # pragma: no cover
+            conn.ws.connected = False
+            self._finalize(conn)
+            return
+        conn.events = selectors.EVENT_READ
+        if conn.ws.ping_interval:
+            self._add_timer(time() + conn.ws.ping_interval, self._ping, conn)
+        self._update(conn)
+
+    def _update(self, conn):
+        with conn.cond:
+            conn.writing = bool(conn.out_buffer)
+        events = 0
+        if not conn.paused:
+            events |= selectors.EVENT_READ
+        if conn.writing:
+            events |= selectors.EVENT_WRITE
+        if events == conn.events:
+            return
+        try:
+            if not events:
+                self.selector.unregister(conn.sock)
+            elif not conn.events:
+                self.selector.register(conn.sock, events, conn)
+            else:
+                self.selector.modify(conn.sock, events, conn)
+        except (KeyError, ValueError, OSError):  # pragma: no cover
+            self._finalize(conn)
+            return
+        conn.events = events
+
+    def _flush(self, conn):
+        # must be called with the connection's condition acquired
+        while conn.out_buffer:
+            try:
+                sent = conn.sock.send(conn.out_buffer)
+            except (BlockingIOError, ssl.SSLWantReadError,
+                    ssl.SSLWantWriteError):
+                break
+            except OSError:
+                conn.out_buffer.clear()
+                conn.cond.notify_all()
+                return False
+            del conn.out_buffer[:sent]
+        conn.cond.notify_all()
+        return True
+
+    def _writable(self, conn):
+        with conn.cond:
+            flushed = self._flush(conn)
+            pending = bool(conn.out_buffer)
+        if not flushed:
+            conn.ws.connected = False
+            self._finalize(conn)
+        elif not pending:
+            if conn.closing:
+                self._finalize(conn)
+            else:
+                self._update(conn)
+
+    def _read(self, conn):
+        ws = conn.ws
+        try:
+            ws._read()
+            while ws.connected and getattr(conn.sock, 'pending', None) and \
+                    conn.sock.pending():  # pragma: no cover
+                # SSL sockets can have decrypted data that the selector
+                # does not know about
+                ws._read()
+        except (BlockingIOError, ssl.SSLWantReadError,
+                ssl.SSLWantWriteError):  # pragma: no cover
+            pass
+        except (OSError, ConnectionResetError, LocalProtocolError):
+            ws.connected = False
+            self._finalize(conn)
+            return
+        if not ws.connected:
+            self._close(conn)
+        elif ws._pause_reading():
+            # the application is not keeping up with the incoming messages
+            conn.paused = True
+            self._update(conn)
+
+    def _ping(self, conn, deadline):
+        ws = conn.ws
+        if not ws.connected:
+            return
+        try:
+            if ws._ping():
+                self._add_timer(deadline + ws.ping_interval, self._ping, conn)
+        except (OSError, ConnectionResetError, LocalProtocolError):
+            ws.connected = False
+            self._finalize(conn)
+
+    def _close(self, conn):
+        if conn.closing:
+            return
+        conn.closing = True
+        with conn.cond:
+            pending = bool(conn.out_buffer)
+        if not pending:
+            self._finalize(conn)
+        else:
+            self._add_timer(time() + self.close_timeout,
+                            lambda conn, deadline: self._finalize(conn),
+                            conn)
+
+    def _finalize(self, conn):
+        if conn.closed:
+            return
+        conn.closed = True
+        try:
+            self.selector.unregister(conn.sock)
+        except (KeyError, ValueError):
+            pass
+        conn.sock.close()
+        with self.lock:
+            if self.connections.get(conn.ws) is conn:
+                del self.connections[conn.ws]
+        with conn.cond:
+            conn.out_buffer.clear()
+            conn.cond.notify_all()
+        conn.ws.connected = False
+        conn.ws.event.set()
+
+    def _purge(self):  # pragma: no cover
+        for key in list(self.selector.get_map().values()):
+            if key.data is not None and key.fileobj.fileno() == -1:
+                self._finalize(key.data)
@@ -1,3 +1,4 @@
+from collections import deque
 import selectors
 import socket
 import ssl
@@ -20,21 +21,31 @@ from wsproto.extensions import PerMessageDeflate
 from wsproto.frame_protocol import CloseReason
 from wsproto.utilities import LocalProtocolError
 from .errors import ConnectionError, ConnectionClosed
+from .reactor import Reactor
 
 
 class Base:
     def __init__(self, sock=None, connection_type=None, receive_bytes=4096,
                  ping_interval=None, max_message_size=None,
-                 thread_class=None, event_class=None, selector_class=None):
+                 thread_class=None, event_class=None, selector_class=None,
+                 reactor=None, max_queue=None, max_queue_size=None):
         #: The name of the subprotocol chosen for the WebSocket connection.
         self.subprotocol = None
+        #: The total size of the messages waiting to be received.
+        self.queue_bytes = 0
+        #: The number of times reading from the socket was paused because
+        #: the queue of received messages was full.
+        self.queue_high_water_hits = 0
 
         self.sock = sock
         self.receive_bytes = receive_bytes
         self.ping_interval = ping_interval
         self.max_message_size = max_message_size
+        self.max_queue = max_queue
+        self.max_queue_size = max_queue_size
         self.pong_received = True
-        self.input_buffer = []
+        self.input_buffer = deque()
+        self.reading_paused = False
         self.incoming_message = None
         self.incoming_message_len = 0
         self.connected = False
@@ -52,12 +63,21 @@ class Base:
             selector_class = selectors.DefaultSelector
         self.selector_class = selector_class
         self.event = event_class()
+        self.queue_event = event_class()
+        if reactor is True:
+            reactor = Reactor.default()
+        self.reactor = None
+        self.thread = None
 
         self.ws = WSConnection(connection_type)
         self.handshake()
 
         if not self.connected:  # pragma: no cover
             raise ConnectionError()
+        if reactor:
+            self.reactor = reactor
+            self.reactor.register(self)
+            return
         self.thread = thread_class(target=self._thread)
         self.thread.name = self.thread.name.replace(
             '(_thread)', '(simple_websocket.Base._thread)')
@@ -80,7 +100,7 @@ class Base:
             out_data = self.ws.send(Message(data=data))
         else:
             out_data = self.ws.send(TextMessage(data=str(data)))
-        self.sock.send(out_data)
+        self._write(out_data)
 
     def receive(self, timeout=None):
         """Receive data over the WebSocket connection.
@@ -97,12 +117,22 @@ class Base:
                 return None
             self.event.clear()
         try:
-            return self.input_buffer.pop(0)
+            data = self.input_buffer.popleft()
         except IndexError:
             pass
+        else:
+            self.queue_bytes -= len(data)
+            if self.reading_paused and not self._queue_full():
+                self._resume_reading()
+            return data
         if not self.connected:  # pragma: no cover
             raise ConnectionClosed(self.close_reason, self.close_message)
 
+    @property
+    def queue_depth(self):
+        """The number of messages waiting to be received."""
+        return len(self.input_buffer)
+
     def close(self, reason=None, message=None):
         """Close the WebSocket connection.
 
@@ -116,10 +146,14 @@ class Base:
         out_data = self.ws.send(CloseConnection(
             reason or CloseReason.NORMAL_CLOSURE, message))
         try:
-            self.sock.send(out_data)
+            self._write(out_data)
         except BrokenPipeError:  # pragma: no cover
             pass
         self.connected = False
+        self.queue_event.set()
+        if self.reactor:
+            # the reactor closes the socket once the close frame is sent
+            self.reactor.unregister(self)
 
     def choose_subprotocol(self, request):  # pragma: no cover
         # The method should return the subprotocol to use, or ``None`` if no
@@ -138,25 +172,24 @@ class Base:
                 self.connected = False
 
         while self.connected:
+            if self._pause_reading():
+                # stop reading until the application consumes some of the
+                # queued messages, so that TCP flow control pushes back on
+                # the other side
+                while self.connected and self.reading_paused:
+                    self.queue_event.wait()
+                    self.queue_event.clear()
+                continue
             try:
                 if sel:
                     now = time()
                     if next_ping <= now or not sel.select(next_ping - now):
                         # we reached the timeout, we have to send a ping
-                        if not self.pong_received:
-                            self.close(reason=CloseReason.POLICY_VIOLATION,
-                                       message='Ping/Pong timeout')
-                            self.event.set()
+                        if not self._ping():
                             break
-                        self.pong_received = False
-                        self.sock.send(self.ws.send(Ping()))
                         next_ping = max(now, next_ping) + self.ping_interval
                         continue
-                in_data = self.sock.recv(self.receive_bytes)
-                if len(in_data) == 0:
-                    raise OSError()
-                self.ws.receive_data(in_data)
-                self.connected = self._handle_events()
+                self._read()
             except (OSError, ConnectionResetError,
                     LocalProtocolError):  # pragma: no cover
                 self.connected = False
@@ -165,6 +198,52 @@ class Base:
         sel.close() if sel else None
         self.sock.close()
 
+    def _write(self, data):
+        if self.reactor:
+            self.reactor.write(self, data)
+        else:
+            self.sock.send(data)
+
+    def _read(self):
+        in_data = self.sock.recv(self.receive_bytes)
+        if len(in_data) == 0:
+            raise OSError()
+        self.ws.receive_data(in_data)
+        self.connected = self._handle_events()
+
+    def _queue_full(self):
+        return bool(
+            (self.max_queue and len(self.input_buffer) >= self.max_queue) or
+            (self.max_queue_size and self.queue_bytes >= self.max_queue_size))
+
+    def _pause_reading(self):
+        if not self._queue_full():
+            return False
+        self.queue_high_water_hits += 1
+        self.reading_paused = True
+        if not self._queue_full():  # pragma: no cover
+            # the application made room in the queue in the meantime
+            self.reading_paused = False
+            return False
+        return True
+
+    def _resume_reading(self):
+        self.reading_paused = False
+        if self.reactor:
+            self.reactor.resume(self)
+        else:
+            self.queue_event.set()
+
+    def _ping(self):
+        if not self.pong_received:
+            self.close(reason=CloseReason.POLICY_VIOLATION,
+                       message='Ping/Pong timeout')
+            self.event.set()
+            return False
+        self.pong_received = False
+        self._write(self.ws.send(Ping()))
+        return True
+
     def _handle_events(self):
         keep_going = True
         out_data = b''
@@ -223,14 +302,15 @@ class Base:
                         continue
                     if isinstance(self.incoming_message, (str, bytes)):
                         # single part message
-                        self.input_buffer.append(self.incoming_message)
+                        message = self.incoming_message
                     elif isinstance(event, TextMessage):
                         # convert multi-part message back to text
-                        self.input_buffer.append(
-                            self.incoming_message.decode())
+                        message = self.incoming_message.decode()
                     else:
                         # convert multi-part message back to bytes
-                        self.input_buffer.append(bytes(self.incoming_message))
+                        message = bytes(self.incoming_message)
+                    self.input_buffer.append(message)
+                    self.queue_bytes += len(message)
                     self.incoming_message = None
                     self.incoming_message_len = 0
                     self.event.set()
@@ -241,7 +321,7 @@ class Base:
                 self.event.set()
                 keep_going = False
         if out_data:
-            self.sock.send(out_data)
+            self._write(out_data)
         return keep_going
 
 
@@ -254,7 +334,8 @@ class Server(Base):
     """
     def __init__(self, environ, subprotocols=None, receive_bytes=4096,
                  ping_interval=None, max_message_size=None, thread_class=None,
-                 event_class=None, selector_class=None):
+                 event_class=None, selector_class=None, reactor=None,
+                 max_queue=None, max_queue_size=None):
         self.environ = environ
         self.subprotocols = subprotocols or []
         if isinstance(self.subprotocols, str):
@@ -293,12 +374,14 @@ class Server(Base):
                          ping_interval=ping_interval,
                          max_message_size=max_message_size,
                          thread_class=thread_class, event_class=event_class,
-                         selector_class=selector_class)
+                         selector_class=selector_class, reactor=reactor,
+                         max_queue=max_queue, max_queue_size=max_queue_size)
 
     @classmethod
     def accept(cls, environ, subprotocols=None, receive_bytes=4096,
                ping_interval=None, max_message_size=None, thread_class=None,
-               event_class=None, selector_class=None):
+               event_class=None, selector_class=None, reactor=None,
+               max_queue=None, max_queue_size=None):
         """Accept a WebSocket connection from a client.
 
         :param environ: A WSGI ``environ`` dictionary with the request details.
@@ -334,12 +417,32 @@ class Server(Base):
                                selectors. The default is the
                                ``selectors.DefaultSelector`` class from the
                                Python standard library.
+        :param reactor: A ``Reactor`` instance that performs the I/O for this
+                        connection, or ``True`` to use a reactor that is
+                        shared by all the connections in the process. The
+                        default is ``None``, which starts a dedicated
+                        background thread for the connection. The shared
+                        reactor uses the standard library's thread and
+                        selector classes, regardless of the values given in
+                        ``thread_class`` and ``selector_class``.
+        :param max_queue: The maximum number of received messages that can be
+                          queued while waiting to be returned by
+                          ``receive()``, or ``None`` (the default) for no
+                          limit. When the queue is full the connection stops
+                          reading from the socket, so that TCP flow control
+                          pushes back on the other side.
+        :param max_queue_size: The maximum total size of the received
+                               messages that can be queued, in bytes for
+                               binary messages and characters for text
+                               messages, or ``None`` (the default) for no
+                               limit.
         """
         return cls(environ, subprotocols=subprotocols,
                    receive_bytes=receive_bytes, ping_interval=ping_interval,
                    max_message_size=max_message_size,
                    thread_class=thread_class, event_class=event_class,
-                   selector_class=selector_class)
+                   selector_class=selector_class, reactor=reactor,
+                   max_queue=max_queue, max_queue_size=max_queue_size)
 
     def handshake(self):
         in_data = b'GET / HTTP/1.1\r\n'
@@ -378,7 +481,8 @@ class Client(Base):
     """
     def __init__(self, url, subprotocols=None, headers=None,
                  receive_bytes=4096, ping_interval=None, max_message_size=None,
-                 ssl_context=None, thread_class=None, event_class=None):
+                 ssl_context=None, thread_class=None, event_class=None,
+                 reactor=None, max_queue=None, max_queue_size=None):
         parsed_url = urlsplit(url)
         is_secure = parsed_url.scheme in ['https', 'wss']
         self.host = parsed_url.hostname
@@ -413,12 +517,15 @@ class Client(Base):
                          receive_bytes=receive_bytes,
                          ping_interval=ping_interval,
                          max_message_size=max_message_size,
-                         thread_class=thread_class, event_class=event_class)
+                         thread_class=thread_class, event_class=event_class,
+                         reactor=reactor, max_queue=max_queue,
+                         max_queue_size=max_queue_size)
 
     @classmethod
     def connect(cls, url, subprotocols=None, headers=None,
                 receive_bytes=4096, ping_interval=None, max_message_size=None,
-                ssl_context=None, thread_class=None, event_class=None):
+                ssl_context=None, thread_class=None, event_class=None,
+                reactor=None, max_queue=None, max_queue_size=None):
         """Returns a WebSocket client connection.
 
         :param url: The connection URL. Both ``ws://`` and ``wss://`` URLs are
@@ -455,11 +562,31 @@ class Client(Base):
         :param event_class: The ``Event`` class to use when creating event
                             objects. The default is the `threading.Event``
                             class from the Python standard library.
+        :param reactor: A ``Reactor`` instance that performs the I/O for this
+                        connection, or ``True`` to use a reactor that is
+                        shared by all the connections in the process. The
+                        default is ``None``, which starts a dedicated
+                        background thread for the connection. The shared
+                        reactor uses the standard library's thread class,
+                        regardless of the value given in ``thread_class``.
+        :param max_queue: The maximum number of received messages that can be
+                          queued while waiting to be returned by
+                          ``receive()``, or ``None`` (the default) for no
+                          limit. When the queue is full the connection stops
+                          reading from the socket, so that TCP flow control
+                          pushes back on the other side.
+        :param max_queue_size: The maximum total size of the received
+                               messages that can be queued, in bytes for
+                               binary messages and characters for text
+                               messages, or ``None`` (the default) for no
+                               limit.
         """
         return cls(url, subprotocols=subprotocols, headers=headers,
                    receive_bytes=receive_bytes, ping_interval=ping_interval,
                    max_message_size=max_message_size, ssl_context=ssl_context,
-                   thread_class=thread_class, event_class=event_class)
+                   thread_class=thread_class, event_class=event_class,
+                   reactor=reactor, max_queue=max_queue,
+                   max_queue_size=max_queue_size)
 
     def handshake(self):
         out_data = self.ws.send(Request(host=self.host, target=self.path,
@@ -485,4 +612,5 @@ class Client(Base):
 
     def close(self, reason=None, message=None):
         super().close(reason=reason, message=message)
-        self.sock.close()
+        if not self.reactor:
+            self.sock.close()
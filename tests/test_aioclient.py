@@ -28,7 +28,7 @@ class TestAioSimpleWebSocketClient:
         assert client.rsock == rsock
         assert client.wsock == wsock
         assert client.receive_bytes == 4096
-        assert client.input_buffer == []
+        assert list(client.input_buffer) == []
         assert client.event.__class__.__name__ == 'Event'
         client.wsock.write.assert_called_with(
             b"Request(host='example.com', target='/ws?a=1', extensions=[], "
@@ -40,7 +40,7 @@ class TestAioSimpleWebSocketServer:
         assert server.wsock == wsock
         assert server.mode == 'aiohttp'
         assert server.receive_bytes == 4096
-        assert server.input_buffer == []
+        assert list(server.input_buffer) == []
         assert server.event.__class__.__name__ == 'Event'
         mock_wsconn().receive_data.assert_any_call(
             b'GET / HTTP/1.1\r\n'
@@ -191,6 +191,56 @@ class TestAioSimpleWebSocketServer:
         assert await server.receive() == 'hello'
         assert await server.receive(timeout=0) is None
 
+    @mock.patch('simple_websocket.aiows.asyncio.open_connection')
+    @mock.patch('simple_websocket.aiows.WSConnection')
+    async def test_receive_max_queue(self, mock_wsconn, mock_open_connection):
+        mock_request = mock.MagicMock(headers={})
+        rsock = mock.MagicMock(read=mock.AsyncMock(return_value=b'x'))
+        wsock = mock.MagicMock()
+        mock_open_connection.return_value = (rsock, wsock)
+        server = await self.get_server(mock_wsconn, mock_request, events=[
+            [TextMessage('hello1')],
+            [TextMessage('hello2')],
+            [TextMessage('hello3')],
+        ], max_queue=2)
+        while not server.reading_paused:
+            await asyncio.sleep(0.01)
+        assert server.queue_depth == 2
+        assert server.queue_bytes == 12
+        assert server.queue_high_water_hits == 1
+        assert rsock.read.call_count == 2
+        assert await server.receive() == 'hello1'
+        while server.queue_high_water_hits < 2:
+            await asyncio.sleep(0.01)
+        assert await server.receive() == 'hello2'
+        while server.connected:
+            await asyncio.sleep(0.01)
+        assert await server.receive() == 'hello3'
+        assert server.queue_depth == 0
+        assert server.queue_bytes == 0
+
+    @mock.patch('simple_websocket.aiows.asyncio.open_connection')
+    @mock.patch('simple_websocket.aiows.WSConnection')
+    async def test_receive_max_queue_size(self, mock_wsconn,
+                                          mock_open_connection):
+        mock_request = mock.MagicMock(headers={})
+        rsock = mock.MagicMock(read=mock.AsyncMock(return_value=b'x'))
+        wsock = mock.MagicMock()
+        mock_open_connection.return_value = (rsock, wsock)
+        server = await self.get_server(mock_wsconn, mock_request, events=[
+            [BytesMessage(b'hello')],
+            [BytesMessage(b'hello')],
+        ], max_queue_size=4)
+        while not server.reading_paused:
+            await asyncio.sleep(0.01)
+        assert server.queue_depth == 1
+        assert server.queue_bytes == 5
+        assert await server.receive() == b'hello'
+        while server.connected:
+            await asyncio.sleep(0.01)
+        assert server.queue_high_water_hits == 2
+        assert await server.receive() == b'hello'
+
     @mock.patch('simple_websocket.aiows.asyncio.open_connection')
     @mock.patch('simple_websocket.aiows.WSConnection')
     async def test_close(self, mock_wsconn, mock_open_connection):
@@ -25,7 +25,7 @@ class SimpleWebSocketClientTestCase(unittest.TestCase):
         client = self.get_client(mock_wsconn, 'ws://localhost/ws?a=1')
         assert client.sock == mock_socket()
         assert client.receive_bytes == 4096
-        assert client.input_buffer == []
+        assert list(client.input_buffer) == []
         assert client.event.__class__.__name__ == 'Event'
         client.sock.send.assert_called_with(
             b"Request(host='localhost', target='/ws?a=1', extensions=[], "
@@ -0,0 +1,322 @@
+import socket
+import threading
+import time
+import unittest
+from unittest import mock
+import pytest
+
+from wsproto.events import AcceptConnection, Request, CloseConnection, \
+    TextMessage, Message
+import simple_websocket
+
+
+class SimpleWebSocketReactorTestCase(unittest.TestCase):
+    def get_reactor(self, **kwargs):
+        reactor = simple_websocket.Reactor(**kwargs)
+        self.addCleanup(reactor.close)
+        return reactor
+
+    def get_socketpair(self):
+        sock, peer = socket.socketpair()
+        self.addCleanup(sock.close)
+        self.addCleanup(peer.close)
+        return sock, peer
+
+    def get_server(self, mock_wsconn, sock, events=[], **kwargs):
+        mock_wsconn.return_value = mock.MagicMock()
+        mock_wsconn().events.side_effect = \
+            [iter(ev) for ev in [[
+                Request(host='example.com', target='/ws', subprotocols=[])]] +
+             events + [[CloseConnection(1000, 'bye')]]]
+        mock_wsconn().send = lambda x: str(x).encode('utf-8')
+        return simple_websocket.Server.accept({
+            'werkzeug.socket': sock,
+            'HTTP_HOST': 'example.com',
+            'HTTP_CONNECTION': 'Upgrade',
+            'HTTP_UPGRADE': 'websocket',
+            'HTTP_SEC_WEBSOCKET_KEY': 'Iv8io/9s+lYFgZWcXczP8Q==',
+            'HTTP_SEC_WEBSOCKET_VERSION': '13',
+        }, **kwargs)
+
+    def wait_for(self, condition):
+        for _ in range(500):
+            if condition():
+                break
+            time.sleep(0.01)
+        assert condition()
+
+    def wait_closed(self, sock):
+        self.wait_for(lambda: sock.fileno() == -1)
+
+    @mock.patch('simple_websocket.ws.WSConnection')
+    def test_receive(self, mock_wsconn):
+        sock, peer = self.get_socketpair()
+        reactor = self.get_reactor()
+        server = self.get_server(mock_wsconn, sock, events=[
+            [TextMessage('hello')],
+            [TextMessage('bye')],
+        ], reactor=reactor)
+        assert server.reactor == reactor
+        assert server.thread is None
+        assert reactor.thread.is_alive()
+        assert server.receive(timeout=0) is None
+        peer.send(b'x')
+        assert server.receive(timeout=5) == 'hello'
+        peer.send(b'x')
+        assert server.receive(timeout=5) == 'bye'
+        peer.send(b'x')
+        self.wait_closed(sock)
+        assert not server.connected
+        with pytest.raises(simple_websocket.ConnectionClosed):
+            server.receive()
+
+    @mock.patch('simple_websocket.ws.WSConnection')
+    def test_multiple_connections(self, mock_wsconn):
+        reactor = self.get_reactor()
+        connections = []
+        for i in range(3):
+            sock, peer = self.get_socketpair()
+            server = self.get_server(mock_wsconn, sock, events=[
+                [TextMessage(f'hello {i}')],
+            ], reactor=reactor)
+            connections.append((server, peer))
+        for server, peer in reversed(connections):
+            peer.send(b'x')
+        for i, (server, peer) in enumerate(connections):
+            assert server.receive(timeout=5) == f'hello {i}'
+            peer.close()
+            self.wait_closed(server.sock)
+        assert reactor.thread.is_alive()
+        assert reactor.connections == {}
+
+    @mock.patch('simple_websocket.ws.WSConnection')
+    def test_send(self, mock_wsconn):
+        sock, peer = self.get_socketpair()
+        server = self.get_server(mock_wsconn, sock,
+                                 reactor=self.get_reactor())
+        server.send('hello')
+        peer.settimeout(5)
+        assert peer.recv(1024).endswith(
+            b"TextMessage(data='hello', frame_finished=True, "
+            b"message_finished=True)")
+
+    @mock.patch('simple_websocket.ws.WSConnection')
+    def test_receive_max_queue(self, mock_wsconn):
+        sock, peer = self.get_socketpair()
+        reactor = self.get_reactor()
+        server = self.get_server(mock_wsconn, sock, events=[
+            [TextMessage('hello1')],
+            [TextMessage('hello2')],
+        ], reactor=reactor, max_queue=1)
+        peer.send(b'x')
+        self.wait_for(lambda: server.reading_paused)
+        assert reactor.connections[server].paused
+        assert server.queue_high_water_hits == 1
+
+        # the reactor does not read while paused
+        peer.send(b'x')
+        time.sleep(0.1)
+        assert server.queue_depth == 1
+        assert server.receive() == 'hello1'
+        assert server.receive(timeout=5) == 'hello2'
+        assert not reactor.connections[server].paused
+
+    @mock.patch('simple_websocket.ws.WSConnection')
+    def test_server_close_without_reply(self, mock_wsconn):
+        sock, peer = self.get_socketpair()
+        reactor = self.get_reactor()
+        server = self.get_server(mock_wsconn, sock, reactor=reactor)
+        server.close()
+        self.wait_closed(sock)
+        assert not server.connected
+        assert reactor.connections == {}
+        peer.settimeout(5)
+        assert peer.recv(1024).endswith(
+            b'CloseConnection(code=<CloseReason.NORMAL_CLOSURE: 1000>, '
+            b'reason=None)')
+
+    @mock.patch('simple_websocket.ws.WSConnection')
+    def test_ping_timeout(self, mock_wsconn):
+        sock, peer = self.get_socketpair()
+        server = self.get_server(mock_wsconn, sock, ping_interval=0.2,
+                                 reactor=self.get_reactor())
+        peer.settimeout(5)
+        assert peer.recv(1024).startswith(b'AcceptConnection')
+        assert peer.recv(1024) == b'Ping(payload=b\'\')'
+        assert peer.recv(1024).startswith(b'CloseConnection')
+        self.wait_closed(sock)
+        assert not server.connected
+
+    @mock.patch('simple_websocket.ws.WSConnection')
+    def test_ping_error(self, mock_wsconn):
+        reactor = self.get_reactor()
+        sock1, peer1 = self.get_socketpair()
+        server1 = self.get_server(mock_wsconn, sock1, ping_interval=0.05,
+                                  reactor=reactor)
+        sock2, peer2 = self.get_socketpair()
+        server2 = self.get_server(mock_wsconn, sock2, events=[
+            [TextMessage('hello')],
+        ], reactor=reactor)
+        with mock.patch.object(server1, '_ping', side_effect=BrokenPipeError):
+            self.wait_closed(sock1)
+        assert not server1.connected
+        assert reactor.thread.is_alive()
+        peer2.send(b'x')
+        assert server2.receive(timeout=5) == 'hello'
+
+    @mock.patch('simple_websocket.ws.WSConnection')
+    def test_fd_reuse(self, mock_wsconn):
+        reactor = self.get_reactor()
+        sock1, peer1 = self.get_socketpair()
+        server1 = self.get_server(mock_wsconn, sock1, reactor=reactor)
+        self.wait_for(lambda: reactor.selector.get_map().get(
+            sock1.fileno()) is not None)
+
+        # the web server closes the socket behind the reactor's back
+        fd = sock1.fileno()
+        sock1.close()
+        peer1.close()
+        sock2, peer2 = self.get_socketpair()
+        if sock2.fileno() != fd:  # pragma: no cover
+            sock2, peer2 = peer2, sock2
+        assert sock2.fileno() == fd
+
+        server2 = self.get_server(mock_wsconn, sock2, events=[
+            [TextMessage('hello')],
+        ], reactor=reactor)
+        peer2.send(b'x')
+        assert server2.receive(timeout=5) == 'hello'
+        assert reactor.thread.is_alive()
+        assert not server1.connected
+
+    @mock.patch('simple_websocket.ws.WSConnection')
+    def test_slow_peer(self, mock_wsconn):
+        reactor = self.get_reactor(write_buffer_size=65536)
+        sock1, peer1 = self.get_socketpair()
+        server1 = self.get_server(mock_wsconn, sock1, reactor=reactor)
+        sock2, peer2 = self.get_socketpair()
+        server2 = self.get_server(mock_wsconn, sock2, events=[
+            [TextMessage('hello')],
+        ], reactor=reactor)
+        errors = []
+
+        def flood():
+            # peer1 never reads, so this thread ends up blocked in send()
+            try:
+                for _ in range(1000):
+                    server1.send(b'x' * 65536)
+            except OSError as exc:
+                errors.append(exc)
+
+        thread = threading.Thread(target=flood)
+        thread.start()
+        time.sleep(0.2)
+        assert thread.is_alive()
+
+        peer2.send(b'x')
+        assert server2.receive(timeout=5) == 'hello'
+        server2.send(b'hello')
+        peer2.settimeout(5)
+        data = b''
+        while not data.endswith(b'message_finished=True)'):
+            data += peer2.recv(1024)
+        assert data.endswith(bytes(repr(Message(data=b'hello')), 'utf-8'))
+
+        reactor.close()
+        thread.join()
+        assert isinstance(errors[0], BrokenPipeError)
+        assert not server1.connected
+        assert not server2.connected
+
+    @mock.patch('simple_websocket.ws.WSConnection')
+    def test_slow_peer_drain(self, mock_wsconn):
+        reactor = self.get_reactor(write_buffer_size=65536)
+        sock, peer = self.get_socketpair()
+        server = self.get_server(mock_wsconn, sock, reactor=reactor)
+        payload = b'x' * 65536
+        expected = len(repr(Message(data=payload))) * 20
+
+        def flood():
+            for _ in range(20):
+                server.send(payload)
+            server.close()
+
+        thread = threading.Thread(target=flood)
+        thread.start()
+        time.sleep(0.2)
+        assert thread.is_alive()
+
+        peer.settimeout(5)
+        received = len(peer.recv(1024))  # AcceptConnection
+        while True:
+            data = peer.recv(65536)
+            if not data:
+                break
+            received += len(data)
+        thread.join()
+        assert received >= expected
+        self.wait_closed(sock)
+        assert reactor.connections == {}
+
+    @mock.patch('simple_websocket.ws.WSConnection')
+    def test_close(self, mock_wsconn):
+        sock, peer = self.get_socketpair()
+        reactor = simple_websocket.Reactor()
+        server = self.get_server(mock_wsconn, sock, reactor=reactor)
+        thread = reactor.thread
+        reactor.close()
+        assert not thread.is_alive()
+        assert sock.fileno() == -1
+        assert not server.connected
+        with pytest.raises(simple_websocket.ConnectionClosed):
+            server.receive()
+        reactor.close()
+
+        sock, peer = self.get_socketpair()
+        with pytest.raises(RuntimeError):
+            self.get_server(mock_wsconn, sock, reactor=reactor)
+
+    def test_close_unused(self):
+        reactor = simple_websocket.Reactor()
+        reactor.close()
+        assert reactor.thread is None
+        assert reactor.wakeup_rsock.fileno() == -1
+
+    @mock.patch('simple_websocket.ws.WSConnection')
+    def test_client_close(self, mock_wsconn):
+        listener = socket.socket()
+        self.addCleanup(listener.close)
+        listener.bind(('127.0.0.1', 0))
+        listener.listen()
+        peers = []
+
+        def accept():
+            peers.append(listener.accept()[0])
+            self.addCleanup(peers[0].close)
+            peers[0].send(b'x')
+
+        thread = threading.Thread(target=accept)
+        thread.start()
+        mock_wsconn().events.side_effect = \
+            [iter(ev) for ev in [[AcceptConnection()], []]]
+        mock_wsconn().send = lambda x: str(x).encode('utf-8')
+        client = simple_websocket.Client.connect(
+            'ws://127.0.0.1:{}/ws'.format(listener.getsockname()[1]),
+            reactor=self.get_reactor())
+        thread.join()
+        assert client.thread is None
+        client.close()
+        assert not client.connected
+        self.wait_closed(client.sock)
+        peers[0].settimeout(5)
+        data = b''
+        while not data.endswith(b'reason=None)'):
+            data += peers[0].recv(1024)
+        assert data.startswith(b'Request')
+
+    def test_default(self):
+        reactor = simple_websocket.Reactor.default()
+        assert simple_websocket.Reactor.default() is reactor
+        reactor.close()
+        assert simple_websocket.Reactor.default() is not reactor
+        simple_websocket.Reactor.default().close()
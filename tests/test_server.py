@@ -38,7 +38,7 @@ class SimpleWebSocketServerTestCase(unittest.TestCase):
         assert server.sock == mock_socket
         assert server.mode == 'werkzeug'
         assert server.receive_bytes == 4096
-        assert server.input_buffer == []
+        assert list(server.input_buffer) == []
         assert server.event.__class__.__name__ == 'Event'
         mock_wsconn().receive_data.assert_any_call(
             b'GET / HTTP/1.1\r\n'
@@ -59,7 +59,7 @@ class SimpleWebSocketServerTestCase(unittest.TestCase):
         assert server.sock == mock_socket
         assert server.mode == 'gunicorn'
         assert server.receive_bytes == 4096
-        assert server.input_buffer == []
+        assert list(server.input_buffer) == []
         assert server.event.__class__.__name__ == 'Event'
         mock_wsconn().receive_data.assert_any_call(
             b'GET / HTTP/1.1\r\n'
@@ -199,6 +199,54 @@ class SimpleWebSocketServerTestCase(unittest.TestCase):
         assert server.receive() == 'hello'
         assert server.receive(timeout=0) is None
 
+    @mock.patch('simple_websocket.ws.WSConnection')
+    def test_receive_max_queue(self, mock_wsconn):
+        mock_socket = mock.MagicMock()
+        mock_socket.recv.return_value = b'x'
+        server = self.get_server(mock_wsconn, {
+            'werkzeug.socket': mock_socket,
+        }, events=[
+            [TextMessage('hello1')],
+            [TextMessage('hello2')],
+            [TextMessage('hello3')],
+        ], max_queue=2)
+        while not server.reading_paused:
+            time.sleep(0.01)
+        assert server.queue_depth == 2
+        assert server.queue_bytes == 12
+        assert server.queue_high_water_hits == 1
+        assert mock_socket.recv.call_count == 2
+        assert server.receive() == 'hello1'
+        while server.queue_high_water_hits < 2:
+            time.sleep(0.01)
+        assert server.receive() == 'hello2'
+        while server.connected:
+            time.sleep(0.01)
+        assert server.receive() == 'hello3'
+        assert server.queue_depth == 0
+        assert server.queue_bytes == 0
+
+    @mock.patch('simple_websocket.ws.WSConnection')
+    def test_receive_max_queue_size(self, mock_wsconn):
+        mock_socket = mock.MagicMock()
+        mock_socket.recv.return_value = b'x'
+        server = self.get_server(mock_wsconn, {
+            'werkzeug.socket': mock_socket,
+        }, events=[
+            [BytesMessage(b'hello')],
+            [BytesMessage(b'hello')],
+        ], max_queue_size=4)
+        while not server.reading_paused:
+            time.sleep(0.01)
+        assert server.queue_depth == 1
+        assert server.queue_bytes == 5
+        assert server.queue_high_water_hits == 1
+        assert server.receive() == b'hello'
+        while server.connected:
+            time.sleep(0.01)
+        assert server.queue_high_water_hits == 2
+        assert server.receive() == b'hello'
+
     @mock.patch('simple_websocket.ws.WSConnection')
     def test_close(self, mock_wsconn):
         mock_socket = mock.MagicMock()